@@ -1,8 +1,27 @@
+import csv
+import io
 import json
 import psycopg2
+from psycopg2.extras import execute_values
 import os
 from typing import List, Dict
 
+# Template for movies without TMDB data; title fields are filled in per movie
+BASIC_MOVIE = {
+    'tmdb_id': None,
+    'release_date': None,
+    'runtime': None,
+    'overview': None,
+    'poster_path': None,
+    'backdrop_path': None,
+    'vote_average': None,
+    'vote_count': None,
+    'popularity': None,
+    'trailer_url': None,
+    'rating': None,
+    'genres': ()
+}
+
 def connect_to_database():
     """Connect to PostgreSQL database"""
     try:
@@ -52,6 +71,9 @@ def import_all_movies_to_database():
     cursor = conn.cursor()
     
     try:
+        # Asynchronous commit for the local reload
+        cursor.execute("SET LOCAL synchronous_commit = OFF")
+        
         # Clear existing data
         print("Clearing existing movie data...")
         cursor.execute("DELETE FROM movie_genres")
@@ -62,14 +84,12 @@ def import_all_movies_to_database():
         
         # Import ALL movies
         print("Importing all movies...")
-        imported_count = 0
         enriched_count = 0
         basic_count = 0
+        movie_rows = []
+        genres_by_title = {}
         
-        for i, original_movie in enumerate(original_movies, 1):
-            if i % 50 == 0:
-                print(f"Processed {i}/{len(original_movies)} movies...")
-            
+        for original_movie in original_movies:
             title = original_movie['title']
             
             # Check if we have enriched data for this movie
@@ -78,33 +98,10 @@ def import_all_movies_to_database():
                 enriched_count += 1
             else:
                 # Create basic movie entry without TMDB data
-                movie = {
-                    'title': title,
-                    'original_title': title,
-                    'tmdb_id': None,
-                    'release_date': None,
-                    'runtime': None,
-                    'overview': None,
-                    'poster_path': None,
-                    'backdrop_path': None,
-                    'vote_average': None,
-                    'vote_count': None,
-                    'popularity': None,
-                    'trailer_url': None,
-                    'rating': None,
-                    'genres': []
-                }
+                movie = {**BASIC_MOVIE, 'title': title, 'original_title': title}
                 basic_count += 1
             
-            # Insert movie data
-            cursor.execute("""
-                INSERT INTO movies (
-                    title, original_title, tmdb_id, release_date, runtime, overview,
-                    poster_path, backdrop_path, vote_average, vote_count, popularity, trailer_url, rating
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                ) RETURNING id
-            """, (
+            movie_rows.append((
                 clean_value(movie.get('title')),
                 clean_value(movie.get('original_title')),
                 clean_value(movie.get('tmdb_id')),
@@ -120,28 +117,51 @@ def import_all_movies_to_database():
                 clean_value(movie.get('rating'))
             ))
             
-            movie_id = cursor.fetchone()[0]
-            imported_count += 1
-            
-            # Insert genres (only for enriched movies)
             if movie.get('genres'):
-                for genre_name in movie['genres']:
-                    # Get or create genre
-                    cursor.execute("SELECT id FROM genres WHERE name = %s", (genre_name,))
-                    result = cursor.fetchone()
-                    
-                    if result:
-                        genre_id = result[0]
-                    else:
-                        cursor.execute("INSERT INTO genres (name) VALUES (%s) RETURNING id", (genre_name,))
-                        genre_id = cursor.fetchone()[0]
-                    
-                    # Link movie to genre
-                    cursor.execute("""
-                        INSERT INTO movie_genres (movie_id, genre_id)
-                        VALUES (%s, %s)
-                        ON CONFLICT DO NOTHING
-                    """, (movie_id, genre_id))
+                genres_by_title[movie['title']] = movie['genres']
+        
+        # The table was just cleared, so bulk load it with COPY
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(movie_rows)
+        buffer.seek(0)
+        cursor.copy_expert("""
+            COPY movies (
+                title, original_title, tmdb_id, release_date, runtime, overview,
+                poster_path, backdrop_path, vote_average, vote_count, popularity, trailer_url, rating
+            ) FROM STDIN WITH (FORMAT csv, NULL '')
+        """, buffer)
+        
+        cursor.execute("SELECT id, title FROM movies")
+        inserted_movies = cursor.fetchall()
+        imported_count = len(inserted_movies)
+        
+        # Load existing genres and create any missing ones in one statement
+        cursor.execute("SELECT id, name FROM genres")
+        genre_ids = {name: genre_id for genre_id, name in cursor.fetchall()}
+        
+        new_genres = {
+            genre_name
+            for genres in genres_by_title.values()
+            for genre_name in genres
+        } - genre_ids.keys()
+        if new_genres:
+            created_genres = execute_values(cursor, """
+                INSERT INTO genres (name) VALUES %s
+                ON CONFLICT DO NOTHING
+                RETURNING id, name
+            """, [(genre_name,) for genre_name in new_genres], fetch=True)
+            genre_ids.update({name: genre_id for genre_id, name in created_genres})
+        
+        # Link movies to genres (only for enriched movies)
+        movie_genre_rows = [
+            (movie_id, genre_ids[genre_name])
+            for movie_id, title in inserted_movies
+            for genre_name in genres_by_title.get(title, [])
+        ]
+        execute_values(cursor, """
+            INSERT INTO movie_genres (movie_id, genre_id) VALUES %s
+            ON CONFLICT DO NOTHING
+        """, movie_genre_rows, page_size=2000)
         
         # Commit changes
         conn.commit()
@@ -150,17 +170,12 @@ def import_all_movies_to_database():
         print(f"- Basic movies: {basic_count}")
         
         # Print some statistics
-        cursor.execute("SELECT COUNT(*) FROM movies")
-        movie_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM genres")
-        genre_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM movies WHERE tmdb_id IS NOT NULL")
-        movies_with_tmdb = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM movies WHERE tmdb_id IS NULL")
-        movies_without_tmdb = cursor.fetchone()[0]
+        cursor.execute("""
+            SELECT COUNT(*), COUNT(tmdb_id), COUNT(*) - COUNT(tmdb_id),
+                   (SELECT COUNT(*) FROM genres)
+            FROM movies
+        """)
+        movie_count, movies_with_tmdb, movies_without_tmdb, genre_count = cursor.fetchone()
         
         print(f"\nDatabase Statistics:")
         print(f"- Total Movies: {movie_count}")
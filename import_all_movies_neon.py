@@ -4,10 +4,12 @@ Import ALL movies from the original movies.json file to Neon database
 This ensures we have all 781 movies, not just the 717 enriched ones
 """
 
+import csv
+import io
 import json
 import os
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -22,7 +24,13 @@ if not DATABASE_URL:
 def connect_to_database():
     """Connect to the Neon database"""
     try:
-        conn = psycopg2.connect(DATABASE_URL)
+        conn = psycopg2.connect(
+            DATABASE_URL,
+            keepalives=1,
+            keepalives_idle=30,
+            keepalives_interval=10,
+            keepalives_count=5
+        )
         return conn
     except Exception as e:
         print(f"❌ Error connecting to database: {e}")
@@ -48,55 +56,49 @@ def import_all_movies():
         
         print(f"📊 Found {len(all_movies)} movies in movies.json")
         
-        # Load enriched data if available to merge with basic data
-        enriched_movies = {}
+        # Load enriched data if available to merge with basic data.
+        # Index by casefolded title once here rather than lowering on every lookup.
+        enriched_file = None
         if os.path.exists('improved_enriched_movies.json'):
             print("📁 Loading improved enriched data to merge...")
-            with open('improved_enriched_movies.json', 'r') as f:
-                enriched_data = json.load(f)
-                for movie in enriched_data:
-                    if movie.get('tmdb_id'):
-                        enriched_movies[movie['tmdb_id']] = movie
-                    # Also index by title for fallback matching
-                    enriched_movies[movie['title'].lower()] = movie
+            enriched_file = 'improved_enriched_movies.json'
         elif os.path.exists('enriched_movies.json'):
             print("📁 Loading original enriched data to merge...")
-            with open('enriched_movies.json', 'r') as f:
-                enriched_data = json.load(f)
-                for movie in enriched_data:
-                    if movie.get('tmdb_id'):
-                        enriched_movies[movie['tmdb_id']] = movie
-                    # Also index by title for fallback matching
-                    enriched_movies[movie['title'].lower()] = movie
+            enriched_file = 'enriched_movies.json'
         
-        print(f"📊 Found {len(enriched_movies)} enriched movie entries")
+        enriched_by_title = {}
+        if enriched_file:
+            with open(enriched_file, 'r') as f:
+                for movie in json.load(f):
+                    enriched_by_title[movie['title'].casefold()] = movie
+        
+        print(f"📊 Found {len(enriched_by_title)} enriched movie entries")
         
         # Import all movies
-        imported_count = 0
+        movie_rows = []
+        genres_by_title = {}
         for i, movie in enumerate(all_movies, 1):
             title = movie['title']
             
-            # Check if we have enriched data for this movie
-            enriched_movie = None
-            if title.lower() in enriched_movies:
-                enriched_movie = enriched_movies[title.lower()]
+            # Movies without enriched data look up every field in an empty record
+            enriched_movie = enriched_by_title.get(title.casefold(), {})
             
             # Prepare movie data
             movie_data = {
                 'title': title,
-                'original_title': enriched_movie.get('original_title') if enriched_movie else None,
-                'tmdb_id': enriched_movie.get('tmdb_id') if enriched_movie else None,
-                'release_date': enriched_movie.get('release_date') if enriched_movie else None,
-                'runtime': enriched_movie.get('runtime') if enriched_movie else None,
-                'overview': enriched_movie.get('overview') if enriched_movie else None,
-                'poster_path': enriched_movie.get('poster_path') if enriched_movie else None,
-                'backdrop_path': enriched_movie.get('backdrop_path') if enriched_movie else None,
-                'vote_average': enriched_movie.get('vote_average') if enriched_movie else None,
-                'vote_count': enriched_movie.get('vote_count') if enriched_movie else None,
-                'popularity': enriched_movie.get('popularity') if enriched_movie else None,
-                'trailer_url': enriched_movie.get('trailer_url') if enriched_movie else None,
-                'rating': enriched_movie.get('rating') if enriched_movie else None,
-                'genres': enriched_movie.get('genres', []) if enriched_movie else []
+                'original_title': enriched_movie.get('original_title'),
+                'tmdb_id': enriched_movie.get('tmdb_id'),
+                'release_date': enriched_movie.get('release_date'),
+                'runtime': enriched_movie.get('runtime'),
+                'overview': enriched_movie.get('overview'),
+                'poster_path': enriched_movie.get('poster_path'),
+                'backdrop_path': enriched_movie.get('backdrop_path'),
+                'vote_average': enriched_movie.get('vote_average'),
+                'vote_count': enriched_movie.get('vote_count'),
+                'popularity': enriched_movie.get('popularity'),
+                'trailer_url': enriched_movie.get('trailer_url'),
+                'rating': enriched_movie.get('rating'),
+                'genres': enriched_movie.get('genres', [])
             }
             
             # Clean up data values
@@ -108,55 +110,8 @@ def import_all_movies():
             if tmdb_id == '' or tmdb_id is None:
                 tmdb_id = None
             
-            # Insert movie - use different conflict resolution based on whether we have TMDB data
-            if tmdb_id:
-                # For movies with TMDB data, use tmdb_id for conflict resolution
-                cursor.execute("""
-                    INSERT INTO movies (
-                        title, original_title, tmdb_id, release_date, runtime,
-                        overview, poster_path, backdrop_path, vote_average,
-                        vote_count, popularity, trailer_url, rating
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (tmdb_id) DO UPDATE SET
-                        title = EXCLUDED.title,
-                        original_title = EXCLUDED.original_title,
-                        release_date = EXCLUDED.release_date,
-                        runtime = EXCLUDED.runtime,
-                        overview = EXCLUDED.overview,
-                        poster_path = EXCLUDED.poster_path,
-                        backdrop_path = EXCLUDED.backdrop_path,
-                        vote_average = EXCLUDED.vote_average,
-                        vote_count = EXCLUDED.vote_count,
-                        popularity = EXCLUDED.popularity,
-                        trailer_url = EXCLUDED.trailer_url,
-                        rating = EXCLUDED.rating
-                    RETURNING id
-                """, (
-                    movie_data['title'],
-                    movie_data['original_title'],
-                    tmdb_id,
-                    release_date,
-                    movie_data['runtime'],
-                    movie_data['overview'],
-                    movie_data['poster_path'],
-                    movie_data['backdrop_path'],
-                    movie_data['vote_average'],
-                    movie_data['vote_count'],
-                    movie_data['popularity'],
-                    movie_data['trailer_url'],
-                    movie_data['rating']
-                ))
-            else:
-                # For movies without TMDB data, just insert and ignore duplicates
-                cursor.execute("""
-                    INSERT INTO movies (
-                        title, original_title, tmdb_id, release_date, runtime,
-                        overview, poster_path, backdrop_path, vote_average,
-                        vote_count, popularity, trailer_url, rating
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT DO NOTHING
-                    RETURNING id
-                """, (
+            movie_rows.append((
+                i,
                 movie_data['title'],
                 movie_data['original_title'],
                 tmdb_id,
@@ -171,35 +126,97 @@ def import_all_movies():
                 movie_data['trailer_url'],
                 movie_data['rating']
             ))
-            
-            result = cursor.fetchone()
-            if result:
-                movie_id = result[0]
-            else:
-                # Movie already exists, get its ID
-                cursor.execute("SELECT id FROM movies WHERE title = %s", (movie_data['title'],))
-                movie_id = cursor.fetchone()[0]
-            
-            # Insert genres if available
             if movie_data['genres']:
-                for genre_name in movie_data['genres']:
-                    # Get genre ID
-                    cursor.execute("SELECT id FROM genres WHERE name = %s", (genre_name,))
-                    genre_result = cursor.fetchone()
-                    if genre_result:
-                        genre_id = genre_result[0]
-                        # Insert movie-genre relationship
-                        cursor.execute("""
-                            INSERT INTO movie_genres (movie_id, genre_id)
-                            VALUES (%s, %s)
-                            ON CONFLICT DO NOTHING
-                        """, (movie_id, genre_id))
-            
-            imported_count += 1
-            
-            if i % 50 == 0:
-                print(f"   Progress: {i}/{len(all_movies)} movies imported")
-                conn.commit()
+                genres_by_title[movie_data['title']] = movie_data['genres']
+        
+        # Asynchronous commit for the Neon import
+        cursor.execute("SET LOCAL synchronous_commit = OFF")
+        
+        # Stage every movie with a single COPY, then merge into movies server-side
+        cursor.execute("""
+            CREATE TEMP TABLE movies_stage ON COMMIT DROP AS
+            SELECT 0 AS position, title, original_title, tmdb_id, release_date, runtime,
+                   overview, poster_path, backdrop_path, vote_average,
+                   vote_count, popularity, trailer_url, rating
+            FROM movies
+            WITH NO DATA
+        """)
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(movie_rows)
+        buffer.seek(0)
+        cursor.copy_expert("""
+            COPY movies_stage (
+                position, title, original_title, tmdb_id, release_date, runtime,
+                overview, poster_path, backdrop_path, vote_average,
+                vote_count, popularity, trailer_url, rating
+            ) FROM STDIN WITH (FORMAT csv, NULL '')
+        """, buffer)
+        
+        # For movies with TMDB data, use tmdb_id for conflict resolution.
+        # DISTINCT ON keeps the last staged row per tmdb_id, as sequential upserts would.
+        cursor.execute("""
+            INSERT INTO movies (
+                title, original_title, tmdb_id, release_date, runtime,
+                overview, poster_path, backdrop_path, vote_average,
+                vote_count, popularity, trailer_url, rating
+            )
+            SELECT DISTINCT ON (tmdb_id)
+                title, original_title, tmdb_id, release_date, runtime,
+                overview, poster_path, backdrop_path, vote_average,
+                vote_count, popularity, trailer_url, rating
+            FROM movies_stage
+            WHERE tmdb_id IS NOT NULL
+            ORDER BY tmdb_id, position DESC
+            ON CONFLICT (tmdb_id) DO UPDATE SET
+                title = EXCLUDED.title,
+                original_title = EXCLUDED.original_title,
+                release_date = EXCLUDED.release_date,
+                runtime = EXCLUDED.runtime,
+                overview = EXCLUDED.overview,
+                poster_path = EXCLUDED.poster_path,
+                backdrop_path = EXCLUDED.backdrop_path,
+                vote_average = EXCLUDED.vote_average,
+                vote_count = EXCLUDED.vote_count,
+                popularity = EXCLUDED.popularity,
+                trailer_url = EXCLUDED.trailer_url,
+                rating = EXCLUDED.rating
+            RETURNING id, title
+        """)
+        imported_movies = cursor.fetchall()
+        
+        # For movies without TMDB data, just insert and ignore duplicates
+        cursor.execute("""
+            INSERT INTO movies (
+                title, original_title, tmdb_id, release_date, runtime,
+                overview, poster_path, backdrop_path, vote_average,
+                vote_count, popularity, trailer_url, rating
+            )
+            SELECT
+                title, original_title, tmdb_id, release_date, runtime,
+                overview, poster_path, backdrop_path, vote_average,
+                vote_count, popularity, trailer_url, rating
+            FROM movies_stage
+            WHERE tmdb_id IS NULL
+            ORDER BY position
+            ON CONFLICT DO NOTHING
+            RETURNING id, title
+        """)
+        imported_movies += cursor.fetchall()
+        imported_count = len(imported_movies)
+        
+        # Insert genres if available, resolving names from a single genres read
+        cursor.execute("SELECT id, name FROM genres")
+        genre_ids = {name: genre_id for genre_id, name in cursor.fetchall()}
+        movie_genre_rows = [
+            (movie_id, genre_ids[genre_name])
+            for movie_id, title in imported_movies
+            for genre_name in genres_by_title.get(title, [])
+            if genre_name in genre_ids
+        ]
+        execute_values(cursor, """
+            INSERT INTO movie_genres (movie_id, genre_id) VALUES %s
+            ON CONFLICT DO NOTHING
+        """, movie_genre_rows, page_size=2000)
         
         conn.commit()
         print(f"✅ Successfully imported {imported_count} movies")
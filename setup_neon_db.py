@@ -1,5 +1,8 @@
 #!/usr/bin/env python3
+import csv
+import io
 import psycopg2
+from psycopg2.extras import execute_values
 import json
 import os
 from typing import List, Dict
@@ -14,117 +17,133 @@ if not DATABASE_URL:
     print("❌ Error: DATABASE_URL not found in .env file")
     exit(1)
 
+# Movie columns in the order they are staged for COPY
+MOVIE_COLUMNS = (
+    'title', 'original_title', 'tmdb_id', 'release_date', 'runtime',
+    'overview', 'poster_path', 'backdrop_path', 'vote_average',
+    'vote_count', 'popularity', 'trailer_url', 'rating'
+)
+
+# Tables, updated_at trigger function and triggers, sent as a single statement batch.
+# Indexes are created separately, after the movie import.
+SCHEMA_SQL = """
+    -- Create genres table
+    CREATE TABLE IF NOT EXISTS genres (
+        id SERIAL PRIMARY KEY,
+        name VARCHAR(100) UNIQUE NOT NULL,
+        created_at TIMESTAMP DEFAULT NOW(),
+        updated_at TIMESTAMP DEFAULT NOW()
+    );
+    
+    -- Create movies table
+    CREATE TABLE IF NOT EXISTS movies (
+        id SERIAL PRIMARY KEY,
+        title VARCHAR(255) NOT NULL,
+        original_title VARCHAR(255),
+        tmdb_id INTEGER UNIQUE,
+        release_date DATE,
+        runtime INTEGER,
+        overview TEXT,
+        poster_path VARCHAR(500),
+        backdrop_path VARCHAR(500),
+        vote_average NUMERIC(3,1),
+        vote_count INTEGER,
+        popularity NUMERIC(10,2),
+        trailer_url VARCHAR(500),
+        rating VARCHAR(10),
+        created_at TIMESTAMP DEFAULT NOW(),
+        updated_at TIMESTAMP DEFAULT NOW()
+    );
+    
+    -- Create movie_genres junction table
+    CREATE TABLE IF NOT EXISTS movie_genres (
+        movie_id INTEGER REFERENCES movies(id) ON DELETE CASCADE,
+        genre_id INTEGER REFERENCES genres(id) ON DELETE CASCADE,
+        PRIMARY KEY (movie_id, genre_id)
+    );
+    
+    -- Create updated_at trigger function
+    CREATE OR REPLACE FUNCTION update_updated_at_column()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        NEW.updated_at = NOW();
+        RETURN NEW;
+    END;
+    $$ language 'plpgsql';
+    
+    -- Create triggers
+    DROP TRIGGER IF EXISTS update_movies_updated_at ON movies;
+    CREATE TRIGGER update_movies_updated_at 
+        BEFORE UPDATE ON movies 
+        FOR EACH ROW 
+        EXECUTE FUNCTION update_updated_at_column();
+    
+    DROP TRIGGER IF EXISTS update_genres_updated_at ON genres;
+    CREATE TRIGGER update_genres_updated_at 
+        BEFORE UPDATE ON genres 
+        FOR EACH ROW 
+        EXECUTE FUNCTION update_updated_at_column();
+"""
+
 def connect_to_database():
     """Connect to Neon PostgreSQL database"""
     try:
-        conn = psycopg2.connect(DATABASE_URL)
+        # Every remote Neon connection enables TCP keepalives, so idle NAT/proxy
+        # hops don't drop it during a long load
+        conn = psycopg2.connect(
+            DATABASE_URL,
+            keepalives=1,
+            keepalives_idle=30,
+            keepalives_interval=10,
+            keepalives_count=5
+        )
         return conn
     except Exception as e:
         print(f"Error connecting to database: {e}")
         return None
 
-def setup_database_schema():
-    """Set up the database schema"""
-    conn = connect_to_database()
-    if not conn:
-        return False
-    
+def create_tables(conn):
+    """Create the tables, trigger function and triggers (indexes come after the import)"""
     try:
         cursor = conn.cursor()
         
-        # Create genres table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS genres (
-                id SERIAL PRIMARY KEY,
-                name VARCHAR(100) UNIQUE NOT NULL,
-                created_at TIMESTAMP DEFAULT NOW(),
-                updated_at TIMESTAMP DEFAULT NOW()
-            )
-        """)
-        
-        # Create movies table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS movies (
-                id SERIAL PRIMARY KEY,
-                title VARCHAR(255) NOT NULL,
-                original_title VARCHAR(255),
-                tmdb_id INTEGER UNIQUE,
-                release_date DATE,
-                runtime INTEGER,
-                overview TEXT,
-                poster_path VARCHAR(500),
-                backdrop_path VARCHAR(500),
-                vote_average NUMERIC(3,1),
-                vote_count INTEGER,
-                popularity NUMERIC(10,2),
-                trailer_url VARCHAR(500),
-                rating VARCHAR(10),
-                created_at TIMESTAMP DEFAULT NOW(),
-                updated_at TIMESTAMP DEFAULT NOW()
-            )
-        """)
+        # Send all table, function and trigger DDL in one round trip
+        cursor.execute(SCHEMA_SQL)
         
-        # Create movie_genres junction table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS movie_genres (
-                movie_id INTEGER REFERENCES movies(id) ON DELETE CASCADE,
-                genre_id INTEGER REFERENCES genres(id) ON DELETE CASCADE,
-                PRIMARY KEY (movie_id, genre_id)
-            )
-        """)
-        
-        # Create indexes
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_movies_title ON movies USING gin(to_tsvector('english', title))")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_movies_tmdb_id ON movies(tmdb_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_movies_popularity ON movies(popularity)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_movies_release_date ON movies(release_date)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_movies_vote_average ON movies(vote_average)")
-        
-        # Create updated_at trigger function
-        cursor.execute("""
-            CREATE OR REPLACE FUNCTION update_updated_at_column()
-            RETURNS TRIGGER AS $$
-            BEGIN
-                NEW.updated_at = NOW();
-                RETURN NEW;
-            END;
-            $$ language 'plpgsql';
-        """)
+        conn.commit()
+        print("✅ Database tables created successfully")
+        return True
         
-        # Create triggers
-        cursor.execute("""
-            DROP TRIGGER IF EXISTS update_movies_updated_at ON movies;
-            CREATE TRIGGER update_movies_updated_at 
-                BEFORE UPDATE ON movies 
-                FOR EACH ROW 
-                EXECUTE FUNCTION update_updated_at_column();
-        """)
+    except Exception as e:
+        print(f"❌ Error creating tables: {e}")
+        conn.rollback()
+        return False
+
+def create_indexes(conn):
+    """Create indexes once the data is loaded, so the import doesn't maintain them row by row"""
+    try:
+        cursor = conn.cursor()
         
+        # Title search uses ILIKE, which never reads a to_tsvector index, so don't maintain one
         cursor.execute("""
-            DROP TRIGGER IF EXISTS update_genres_updated_at ON genres;
-            CREATE TRIGGER update_genres_updated_at 
-                BEFORE UPDATE ON genres 
-                FOR EACH ROW 
-                EXECUTE FUNCTION update_updated_at_column();
+            DROP INDEX IF EXISTS idx_movies_title;
+            CREATE INDEX IF NOT EXISTS idx_movies_tmdb_id ON movies(tmdb_id);
+            CREATE INDEX IF NOT EXISTS idx_movies_popularity ON movies(popularity);
+            CREATE INDEX IF NOT EXISTS idx_movies_release_date ON movies(release_date);
+            CREATE INDEX IF NOT EXISTS idx_movies_vote_average ON movies(vote_average);
         """)
         
         conn.commit()
-        print("✅ Database schema created successfully")
+        print("✅ Indexes created successfully")
         return True
         
     except Exception as e:
-        print(f"❌ Error setting up schema: {e}")
+        print(f"❌ Error creating indexes: {e}")
         conn.rollback()
         return False
-    finally:
-        conn.close()
 
-def insert_genres():
+def insert_genres(conn):
     """Insert default genres"""
-    conn = connect_to_database()
-    if not conn:
-        return False
-    
     try:
         cursor = conn.cursor()
         
@@ -135,12 +154,11 @@ def insert_genres():
             'Romance', 'Science Fiction', 'TV Movie', 'Thriller', 'War', 'Western'
         ]
         
-        for genre in genres:
-            cursor.execute("""
-                INSERT INTO genres (name) 
-                VALUES (%s) 
-                ON CONFLICT (name) DO NOTHING
-            """, (genre,))
+        execute_values(cursor, """
+            INSERT INTO genres (name) 
+            VALUES %s 
+            ON CONFLICT (name) DO NOTHING
+        """, [(genre,) for genre in genres])
         
         conn.commit()
         print(f"✅ Inserted {len(genres)} genres")
@@ -150,15 +168,9 @@ def insert_genres():
         print(f"❌ Error inserting genres: {e}")
         conn.rollback()
         return False
-    finally:
-        conn.close()
 
-def import_movies():
+def import_movies(conn):
     """Import movies from the local database or JSON files"""
-    conn = connect_to_database()
-    if not conn:
-        return False
-    
     try:
         cursor = conn.cursor()
         
@@ -177,73 +189,106 @@ def import_movies():
         
         print(f"📊 Importing {len(movies_data)} movies...")
         
-        for i, movie in enumerate(movies_data, 1):
-            # Insert movie
-            # Clean up data values
-            release_date = movie.get('release_date')
-            if release_date == '' or release_date is None:
-                release_date = None
+        # Asynchronous commit for the setup import
+        cursor.execute("SET LOCAL synchronous_commit = OFF")
+        
+        # Write each movie straight into a CSV buffer for a single COPY into staging
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        genres_by_tmdb_id = {}
+        for position, movie in enumerate(movies_data):
+            # Empty strings and None both become empty fields, which COPY reads as NULL
+            writer.writerow((position, *(movie.get(column) for column in MOVIE_COLUMNS)))
             
             tmdb_id = movie.get('tmdb_id')
-            if tmdb_id == '' or tmdb_id is None:
-                tmdb_id = None
-            
-            cursor.execute("""
-                INSERT INTO movies (
-                    title, original_title, tmdb_id, release_date, runtime,
-                    overview, poster_path, backdrop_path, vote_average,
-                    vote_count, popularity, trailer_url, rating
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (tmdb_id) DO UPDATE SET
-                    title = EXCLUDED.title,
-                    original_title = EXCLUDED.original_title,
-                    release_date = EXCLUDED.release_date,
-                    runtime = EXCLUDED.runtime,
-                    overview = EXCLUDED.overview,
-                    poster_path = EXCLUDED.poster_path,
-                    backdrop_path = EXCLUDED.backdrop_path,
-                    vote_average = EXCLUDED.vote_average,
-                    vote_count = EXCLUDED.vote_count,
-                    popularity = EXCLUDED.popularity,
-                    trailer_url = EXCLUDED.trailer_url,
-                    rating = EXCLUDED.rating
-                RETURNING id
-            """, (
-                movie.get('title'),
-                movie.get('original_title'),
-                tmdb_id,
-                release_date,
-                movie.get('runtime'),
-                movie.get('overview'),
-                movie.get('poster_path'),
-                movie.get('backdrop_path'),
-                movie.get('vote_average'),
-                movie.get('vote_count'),
-                movie.get('popularity'),
-                movie.get('trailer_url'),
-                movie.get('rating')
-            ))
-            
-            movie_id = cursor.fetchone()[0]
-            
-            # Insert genres if available
-            if movie.get('genres'):
-                for genre_name in movie['genres']:
-                    # Get genre ID
-                    cursor.execute("SELECT id FROM genres WHERE name = %s", (genre_name,))
-                    genre_result = cursor.fetchone()
-                    if genre_result:
-                        genre_id = genre_result[0]
-                        # Insert movie-genre relationship
-                        cursor.execute("""
-                            INSERT INTO movie_genres (movie_id, genre_id)
-                            VALUES (%s, %s)
-                            ON CONFLICT DO NOTHING
-                        """, (movie_id, genre_id))
-            
-            if i % 50 == 0:
-                print(f"   Progress: {i}/{len(movies_data)} movies imported")
-                conn.commit()
+            if tmdb_id:
+                genres_by_tmdb_id[tmdb_id] = movie.get('genres') or []
+        buffer.seek(0)
+        
+        cursor.execute("""
+            CREATE TEMP TABLE movies_stage ON COMMIT DROP AS
+            SELECT 0 AS position, title, original_title, tmdb_id, release_date, runtime,
+                   overview, poster_path, backdrop_path, vote_average,
+                   vote_count, popularity, trailer_url, rating
+            FROM movies
+            WITH NO DATA
+        """)
+        cursor.copy_expert("""
+            COPY movies_stage (
+                position, title, original_title, tmdb_id, release_date, runtime,
+                overview, poster_path, backdrop_path, vote_average,
+                vote_count, popularity, trailer_url, rating
+            ) FROM STDIN WITH (FORMAT csv, NULL '')
+        """, buffer)
+        
+        # Merge into movies in one statement. An upsert can only touch each
+        # tmdb_id once, so keep the last staged entry per tmdb_id, as the old
+        # row-by-row upserts would have.
+        cursor.execute("""
+            INSERT INTO movies (
+                title, original_title, tmdb_id, release_date, runtime,
+                overview, poster_path, backdrop_path, vote_average,
+                vote_count, popularity, trailer_url, rating
+            )
+            SELECT
+                title, original_title, tmdb_id, release_date, runtime,
+                overview, poster_path, backdrop_path, vote_average,
+                vote_count, popularity, trailer_url, rating
+            FROM (
+                SELECT DISTINCT ON (tmdb_id) *
+                FROM movies_stage
+                WHERE tmdb_id IS NOT NULL
+                ORDER BY tmdb_id, position DESC
+            ) latest
+            UNION ALL
+            SELECT
+                title, original_title, tmdb_id, release_date, runtime,
+                overview, poster_path, backdrop_path, vote_average,
+                vote_count, popularity, trailer_url, rating
+            FROM movies_stage
+            WHERE tmdb_id IS NULL
+            ON CONFLICT (tmdb_id) DO UPDATE SET
+                title = EXCLUDED.title,
+                original_title = EXCLUDED.original_title,
+                release_date = EXCLUDED.release_date,
+                runtime = EXCLUDED.runtime,
+                overview = EXCLUDED.overview,
+                poster_path = EXCLUDED.poster_path,
+                backdrop_path = EXCLUDED.backdrop_path,
+                vote_average = EXCLUDED.vote_average,
+                vote_count = EXCLUDED.vote_count,
+                popularity = EXCLUDED.popularity,
+                trailer_url = EXCLUDED.trailer_url,
+                rating = EXCLUDED.rating
+        """)
+        
+        # Link genres server-side by tmdb_id (only movies matched on TMDB have any),
+        # so no movie or genre ids need to come back to the client
+        genre_buffer = io.StringIO()
+        csv.writer(genre_buffer).writerows(
+            (tmdb_id, genre_name)
+            for tmdb_id, genres in genres_by_tmdb_id.items()
+            for genre_name in genres
+        )
+        genre_buffer.seek(0)
+        cursor.execute("""
+            CREATE TEMP TABLE movie_genres_stage (
+                tmdb_id INTEGER,
+                genre_name VARCHAR(100)
+            ) ON COMMIT DROP
+        """)
+        cursor.copy_expert(
+            "COPY movie_genres_stage (tmdb_id, genre_name) FROM STDIN WITH (FORMAT csv)",
+            genre_buffer
+        )
+        cursor.execute("""
+            INSERT INTO movie_genres (movie_id, genre_id)
+            SELECT m.id, g.id
+            FROM movie_genres_stage s
+            JOIN movies m ON m.tmdb_id = s.tmdb_id
+            JOIN genres g ON g.name = s.genre_name
+            ON CONFLICT DO NOTHING
+        """)
         
         conn.commit()
         print(f"✅ Successfully imported {len(movies_data)} movies")
@@ -253,37 +298,50 @@ def import_movies():
         print(f"❌ Error importing movies: {e}")
         conn.rollback()
         return False
-    finally:
-        conn.close()
 
 def main():
     """Main setup function"""
     print("🚀 Setting up Neon database for CabinFlix...")
     print("=" * 50)
     
-    # Step 1: Set up schema
-    print("\n1️⃣ Setting up database schema...")
-    if not setup_database_schema():
-        print("❌ Failed to set up schema")
-        return
-    
-    # Step 2: Insert genres
-    print("\n2️⃣ Inserting genres...")
-    if not insert_genres():
-        print("❌ Failed to insert genres")
+    # Share one connection across all steps instead of reconnecting for each
+    conn = connect_to_database()
+    if not conn:
         return
     
-    # Step 3: Import movies
-    print("\n3️⃣ Importing movies...")
-    if not import_movies():
-        print("❌ Failed to import movies")
-        return
+    try:
+        # Step 1: Create tables
+        print("\n1️⃣ Creating database tables...")
+        if not create_tables(conn):
+            print("❌ Failed to create tables")
+            return
+        
+        # Step 2: Insert genres
+        print("\n2️⃣ Inserting genres...")
+        if not insert_genres(conn):
+            print("❌ Failed to insert genres")
+            return
+        
+        # Step 3: Import movies
+        print("\n3️⃣ Importing movies...")
+        if not import_movies(conn):
+            print("❌ Failed to import movies")
+            return
+        
+        # Step 4: Create indexes after the bulk load
+        print("\n4️⃣ Creating indexes...")
+        if not create_indexes(conn):
+            print("❌ Failed to create indexes")
+            return
+    finally:
+        conn.close()
     
     print("\n🎉 Database setup complete!")
     print("=" * 50)
     print("✅ Schema created")
     print("✅ Genres inserted")
     print("✅ Movies imported")
+    print("✅ Indexes created")
     print("\n🌐 Your CabinFlix app is ready for deployment!")
 
 if __name__ == "__main__":
@@ -52,7 +52,6 @@ CREATE TABLE IF NOT EXISTS movie_cast (
 );
 
 -- Create indexes for better performance
-CREATE INDEX IF NOT EXISTS idx_movies_title ON movies USING gin(to_tsvector('english', title));
 CREATE INDEX IF NOT EXISTS idx_movies_release_date ON movies(release_date);
 CREATE INDEX IF NOT EXISTS idx_movies_vote_average ON movies(vote_average);
 CREATE INDEX IF NOT EXISTS idx_movies_popularity ON movies(popularity);
@@ -3,6 +3,8 @@
 Synchronize remote database with current local database data
 """
 
+import csv
+import io
 import json
 import os
 import psycopg2
@@ -20,7 +22,13 @@ if not DATABASE_URL:
 def connect_to_database():
     """Connect to the database"""
     try:
-        conn = psycopg2.connect(DATABASE_URL)
+        conn = psycopg2.connect(
+            DATABASE_URL,
+            keepalives=1,
+            keepalives_idle=30,
+            keepalives_interval=10,
+            keepalives_count=5
+        )
         return conn
     except Exception as e:
         print(f"❌ Error connecting to database: {e}")
@@ -50,11 +58,8 @@ def sync_remote_database():
         print(f"📊 Loaded {len(exported_movies)} movies from export")
         
         # Get current database state
-        cursor.execute("SELECT COUNT(*) FROM movies")
-        current_total = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM movies WHERE tmdb_id IS NOT NULL")
-        current_enriched = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*), COUNT(tmdb_id) FROM movies")
+        current_total, current_enriched = cursor.fetchone()
         
         print(f"📊 Current database: {current_enriched}/{current_total} movies enriched")
         
@@ -65,6 +70,9 @@ def sync_remote_database():
         
         print(f"🔄 Database needs update: {len(exported_movies)} movies in export vs {current_total} in database")
         
+        # Asynchronous commit for the sync reload
+        cursor.execute("SET LOCAL synchronous_commit = OFF")
+        
         # Clear existing data and re-import
         print("🗑️ Clearing existing data...")
         cursor.execute("DELETE FROM movie_genres")
@@ -75,34 +83,33 @@ def sync_remote_database():
         
         print("📥 Importing updated data...")
         
-        # Import the exported data
-        for movie in exported_movies:
-            cursor.execute("""
-                INSERT INTO movies (
-                    title, tmdb_id, release_date, rating, poster_path, 
-                    backdrop_path, overview, popularity, vote_average, vote_count
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                movie['title'],
-                movie['tmdb_id'],
-                movie['release_date'],
-                movie['rating'],
-                movie['poster_path'],
-                movie['backdrop_path'],
-                movie['overview'],
-                movie['popularity'],
-                movie['vote_average'],
-                movie['vote_count']
-            ))
+        # The table was just cleared, so stream the export in with a single COPY
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows((
+            movie['title'],
+            movie['tmdb_id'],
+            movie['release_date'],
+            movie['rating'],
+            movie['poster_path'],
+            movie['backdrop_path'],
+            movie['overview'],
+            movie['popularity'],
+            movie['vote_average'],
+            movie['vote_count']
+        ) for movie in exported_movies)
+        buffer.seek(0)
+        cursor.copy_expert("""
+            COPY movies (
+                title, tmdb_id, release_date, rating, poster_path, 
+                backdrop_path, overview, popularity, vote_average, vote_count
+            ) FROM STDIN WITH (FORMAT csv, NULL '')
+        """, buffer)
         
         conn.commit()
         
         # Verify the update
-        cursor.execute("SELECT COUNT(*) FROM movies")
-        new_total = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM movies WHERE tmdb_id IS NOT NULL")
-        new_enriched = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*), COUNT(tmdb_id) FROM movies")
+        new_total, new_enriched = cursor.fetchone()
         
         print(f"✅ Database synchronized!")
         print(f"📊 New database: {new_enriched}/{new_total} movies enriched ({new_enriched/new_total*100:.1f}%)")